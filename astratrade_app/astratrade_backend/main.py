@@ -1,8 +1,14 @@
 from fastapi import FastAPI, HTTPException, status
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+import threading
+import uvicorn
 
 app = FastAPI(title="AstraTrade Backend API", version="0.2.0")
+# /users and /leaderboard grow with every registration; small bodies skip compression.
+# Level 5 keeps most of the ratio on JSON for a fraction of the default level-9 CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # --- Models ---
 class User(BaseModel):
@@ -47,25 +53,56 @@ class LeaderboardEntry(BaseModel):
 users = [User(id=1, username="demo", password="demo", xp=100, level=2)]
 leaderboard = [LeaderboardEntry(user_id=1, username="demo", xp=100, level=2)]
 user_id_counter = 2
+# Lookup indexes over the lists above, kept in sync on register
+users_by_id: Dict[int, User] = {u.id: u for u in users}
+users_by_name: Dict[str, User] = {u.username: u for u in users}
+leaderboard_by_user_id: Dict[int, LeaderboardEntry] = {e.user_id: e for e in leaderboard}
+# def handlers run concurrently in FastAPI's threadpool; every write to the
+# storage above goes through this lock
+state_lock = threading.Lock()
+
+def _sort_leaderboard():
+    # Keep the leaderboard ranked on every write so reads don't re-sort it.
+    # Ties fall back to user_id, i.e. registration order.
+    # Rank a copy and swap it in with one slice assignment: an in-place sort
+    # would show readers an empty list while it runs. Call with state_lock held.
+    leaderboard[:] = sorted(leaderboard, key=lambda e: (-e.xp, e.user_id))
+
+def _award_xp(user: User, amount: int) -> int:
+    with state_lock:
+        user.xp += amount
+        user.level = 1 + user.xp // 100
+        # Update leaderboard
+        entry = leaderboard_by_user_id[user.id]
+        entry.xp = user.xp
+        entry.level = user.level
+        _sort_leaderboard()
+        return user.xp
 
 # --- Endpoints ---
 @app.post("/register", summary="Register a new user", response_model=User)
 def register_user(req: UserRegisterRequest):
     global user_id_counter
-    if any(u.username == req.username for u in users):
-        raise HTTPException(status_code=400, detail="Username already exists")
-    user = User(id=user_id_counter, username=req.username, password=req.password)
-    users.append(user)
-    leaderboard.append(LeaderboardEntry(user_id=user_id_counter, username=req.username, xp=0, level=1))
-    user_id_counter += 1
+    with state_lock:
+        if req.username in users_by_name:
+            raise HTTPException(status_code=400, detail="Username already exists")
+        user = User(id=user_id_counter, username=req.username, password=req.password)
+        entry = LeaderboardEntry(user_id=user_id_counter, username=req.username, xp=0, level=1)
+        user_id_counter += 1
+        users.append(user)
+        users_by_id[user.id] = user
+        users_by_name[user.username] = user
+        leaderboard.append(entry)
+        leaderboard_by_user_id[entry.user_id] = entry
+        _sort_leaderboard()
     return user
 
 @app.post("/login", summary="Login a user", response_model=UserLoginResponse)
 def login_user(req: UserLoginRequest):
-    for user in users:
-        if user.username == req.username and user.password == req.password:
-            # In production, return a JWT or session token
-            return UserLoginResponse(user_id=user.id, username=user.username, token="fake-token")
+    user = users_by_name.get(req.username)
+    if user is not None and user.password == req.password:
+        # In production, return a JWT or session token
+        return UserLoginResponse(user_id=user.id, username=user.username, token="fake-token")
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @app.get("/users", summary="List all users", response_model=List[User])
@@ -76,38 +113,33 @@ def get_users():
 def place_trade(trade: TradeRequest):
     # Placeholder: always return profit
     # In production, validate user, check balance, etc.
-    for user in users:
-        if user.id == trade.user_id:
-            user.xp += 15
-            user.level = 1 + user.xp // 100
-            # Update leaderboard
-            for entry in leaderboard:
-                if entry.user_id == user.id:
-                    entry.xp = user.xp
-                    entry.level = user.level
-            return TradeResult(
-                outcome="profit",
-                profit_percentage=7.5,
-                message="Stellar Alignment Achieved!",
-                xp_gained=15
-            )
-    raise HTTPException(status_code=404, detail="User not found")
+    user = users_by_id.get(trade.user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    _award_xp(user, 15)
+    return TradeResult(
+        outcome="profit",
+        profit_percentage=7.5,
+        message="Stellar Alignment Achieved!",
+        xp_gained=15
+    )
 
 @app.get("/leaderboard", summary="Get leaderboard", response_model=List[LeaderboardEntry])
 def get_leaderboard():
-    # Return sorted leaderboard
-    return sorted(leaderboard, key=lambda e: e.xp, reverse=True)
+    # Already kept sorted by _sort_leaderboard on every XP change; list() takes
+    # a consistent snapshot without holding state_lock
+    return list(leaderboard)
 
 @app.post("/xp/add", summary="Add XP to a user")
 def add_xp(user_id: int, amount: int):
-    for user in users:
-        if user.id == user_id:
-            user.xp += amount
-            user.level = 1 + user.xp // 100
-            # Update leaderboard
-            for entry in leaderboard:
-                if entry.user_id == user.id:
-                    entry.xp = user.xp
-                    entry.level = user.level
-            return {"status": "ok", "new_xp": user.xp}
-    raise HTTPException(status_code=404, detail="User not found") 
\ No newline at end of file
+    user = users_by_id.get(user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    new_xp = _award_xp(user, amount)
+    return {"status": "ok", "new_xp": new_xp}
+
+if __name__ == "__main__":
+    # uvloop + httptools come with uvicorn[standard]; pin them explicitly so we
+    # never silently fall back to the pure-Python asyncio loop / h11 parser.
+    # Single worker only: users and leaderboard are in-memory per process.
+    uvicorn.run("main:app", host="0.0.0.0", port=8001, loop="uvloop", http="httptools")